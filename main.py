@@ -1,16 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import webbrowser
 import threading
 import json
 import os
+import queue
 import time
-from spider import Spider
-from whois_checker import WhoisChecker
+import types
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from utils import get_domain
-from openpyxl import Workbook
+
+# openpyxl, webbrowser, requests and the crawler modules are imported lazily
+# at their point of use so the window paints without paying their import cost
 
 SETTINGS_FILE = "settings.json"
+
+# orjson parses and serializes several times faster than the stdlib json
+# module; fall back transparently when it isn't installed
+def _json_loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _json_dumps(obj):
+    return orjson.dumps(obj).decode("utf-8") if orjson else json.dumps(obj)
+
+# In-memory settings cache so repeated reads don't hit disk+json.load.
+# Invalidated by mtime so external edits to settings.json are still picked up.
+_settings_cache = {"mtime": None, "data": None}
+
 PREDEFINED_SITES = {
     "金融庁": "https://www.fsa.go.jp",
     "経済産業省": "https://www.meti.go.jp",
@@ -25,6 +45,10 @@ PREDEFINED_SITES = {
     "JETRO": "https://www.jetro.go.jp",
     "J-Net21": "https://j-net21.smrj.go.jp",
 }
+# Read-only view plus a precomputed label tuple; the sites never change at
+# runtime, so nothing needs to rebuild the key list or guard against mutation
+PREDEFINED_SITES = types.MappingProxyType(PREDEFINED_SITES)
+SITE_LABELS = tuple(PREDEFINED_SITES)
 
 def load_settings():
     default_settings = {
@@ -41,15 +65,119 @@ def load_settings():
         }
     }
     if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            loaded_settings = json.load(f)
+        mtime = os.stat(SETTINGS_FILE).st_mtime_ns
+        if _settings_cache["mtime"] != mtime:
+            with open(SETTINGS_FILE, "rb") as f:
+                loaded_settings = _json_loads(f.read())
             # Merge with defaults to ensure all settings exist
-            return {**default_settings, **loaded_settings}
+            _settings_cache["data"] = {**default_settings, **loaded_settings}
+            _settings_cache["mtime"] = mtime
+        return _settings_cache["data"]
     return default_settings
 
 def save_settings(settings):
-    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-        json.dump(settings, f, indent=4)
+    if orjson:
+        with open(SETTINGS_FILE, "wb") as f:
+            f.write(orjson.dumps(settings, option=orjson.OPT_INDENT_2))
+    else:
+        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=4)
+    # Keep the cache in sync so the next load_settings() is a hit
+    _settings_cache["data"] = settings
+    _settings_cache["mtime"] = os.stat(SETTINGS_FILE).st_mtime_ns
+
+def get_settings():
+    """Return the current settings, re-reading the file only when it changed"""
+    return load_settings()
+
+RESOURCE_KEYS = ("images", "documents", "stylesheets", "scripts", "media", "archives")
+
+# Japanese labels for the resource-type checkboxes in the settings dialog
+_RESOURCE_LABELS = {
+    "images": "画像",
+    "documents": "ドキュメント",
+    "stylesheets": "スタイルシート",
+    "scripts": "スクリプト",
+    "media": "メディア",
+    "archives": "アーカイブ"
+}
+
+def runtime_settings():
+    """Normalized snapshot of the settings a scan needs, with every resource key present"""
+    settings = get_settings()
+    resources = settings.get("crawl_resources", {})
+    return {
+        "api_key": settings["api_key"],
+        "crawl_delay": settings["crawl_delay"],
+        "max_depth": settings["max_depth"],
+        "crawl_resources": {key: resources.get(key, False) for key in RESOURCE_KEYS},
+    }
+
+WHOIS_CACHE_FILE = "whois_cache.json"
+WHOIS_CACHE_TTL = 7 * 24 * 60 * 60  # Registrant data rarely changes; 7 days
+WHOIS_CACHE = {}
+WHOIS_WORKERS = 8
+_whois_cache_lock = threading.Lock()
+
+def load_whois_cache():
+    """Load cached WHOIS lookups from disk (one JSON object per line)"""
+    if not os.path.exists(WHOIS_CACHE_FILE):
+        return
+    try:
+        with open(WHOIS_CACHE_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = _json_loads(line)
+                    WHOIS_CACHE[entry["domain"]] = (entry["time"], entry["whois"])
+                except (ValueError, KeyError):
+                    continue
+    except Exception:
+        pass
+
+def cached_whois(whois_checker, domain):
+    """Look up WHOIS info for a domain, serving repeat queries from the cache"""
+    now = time.time()
+    with _whois_cache_lock:
+        hit = WHOIS_CACHE.get(domain)
+    if hit and now - hit[0] < WHOIS_CACHE_TTL:
+        return hit[1]
+
+    whois = whois_checker.check_domain(domain)
+    # Don't persist failed lookups so they are retried next time
+    if whois.get("owner") != "Error":
+        with _whois_cache_lock:
+            WHOIS_CACHE[domain] = (now, whois)
+            try:
+                with open(WHOIS_CACHE_FILE, "a", encoding="utf-8") as f:
+                    f.write(_json_dumps({"domain": domain, "time": now, "whois": whois}) + "\n")
+            except Exception:
+                pass
+    return whois
+
+def fetch_whois_map(whois_checker, results):
+    """Resolve WHOIS info for all external domains concurrently so the
+    post-crawl pass waits for the slowest lookup instead of the sum of all"""
+    domains = {d for d, t in zip(results['domain'], results['type']) if t == 'external'}
+    if not domains or whois_checker is None:
+        return {}
+    with ThreadPoolExecutor(max_workers=WHOIS_WORKERS) as executor:
+        return dict(zip(domains, executor.map(lambda d: cached_whois(whois_checker, d), domains)))
+
+def build_session():
+    """Create a pooled HTTP session shared by the spider and WHOIS checker"""
+    import requests
+    from requests.adapters import HTTPAdapter, Retry
+
+    session = requests.Session()
+    session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 class SettingsWindow(tk.Toplevel):
     def __init__(self, parent, settings):
@@ -73,7 +201,7 @@ class SettingsWindow(tk.Toplevel):
         # WHOIS API Link
         link = tk.Label(main_frame, text="APIキーを取得する", fg="blue", cursor="hand2", font=("Arial", 9, "underline"))
         link.grid(row=1, column=1, sticky="w", pady=(0, 10))
-        link.bind("<Button-1>", lambda e: webbrowser.open_new("https://www.api-ninjas.com/pricing"))
+        link.bind("<Button-1>", self._open_api_key_page)
         
         # Crawl Delay
         ttk.Label(main_frame, text="クロール間隔 (秒):").grid(row=2, column=0, sticky="w", pady=5)
@@ -92,12 +220,10 @@ class SettingsWindow(tk.Toplevel):
         
         # Create checkboxes for each resource type
         self.resource_vars = {}
-        row = 0
-        for resource_type in settings["crawl_resources"]:
+        for row, resource_type in enumerate(settings["crawl_resources"]):
             var = tk.BooleanVar(value=settings["crawl_resources"][resource_type])
             self.resource_vars[resource_type] = var
-            ttk.Checkbutton(resource_frame, text=self._get_resource_label(resource_type), variable=var).grid(row=row, column=0, sticky="w")
-            row += 1
+            ttk.Checkbutton(resource_frame, text=_RESOURCE_LABELS.get(resource_type, resource_type), variable=var).grid(row=row, column=0, sticky="w")
         
         # Buttons
         button_frame = ttk.Frame(main_frame)
@@ -112,18 +238,10 @@ class SettingsWindow(tk.Toplevel):
         # Handle window close
         self.protocol("WM_DELETE_WINDOW", self.on_close)
     
-    def _get_resource_label(self, resource_type):
-        """Get the Japanese label for a resource type"""
-        labels = {
-            "images": "画像",
-            "documents": "ドキュメント",
-            "stylesheets": "スタイルシート",
-            "scripts": "スクリプト",
-            "media": "メディア",
-            "archives": "アーカイブ"
-        }
-        return labels.get(resource_type, resource_type)
-        
+    def _open_api_key_page(self, event):
+        import webbrowser
+        webbrowser.open_new("https://www.api-ninjas.com/pricing")
+
     def save(self):
         # Update API key and other settings
         self.settings.update({
@@ -166,7 +284,7 @@ class SettingsWindow(tk.Toplevel):
         else:
             self.destroy() 
 
-settings = load_settings()
+load_whois_cache()
 
 app = tk.Tk()
 app.title("Broken Link & WHOISチェッカー")
@@ -179,7 +297,7 @@ app.config(menu=menubar)
 # File menu
 file_menu = tk.Menu(menubar, tearoff=0)
 menubar.add_cascade(label="ファイル", menu=file_menu)
-file_menu.add_command(label="設定", command=lambda: SettingsWindow(app, settings))
+file_menu.add_command(label="設定", command=lambda: SettingsWindow(app, get_settings()))
 file_menu.add_separator()
 file_menu.add_command(label="終了", command=app.quit)
 
@@ -189,11 +307,15 @@ top_frame.pack(pady=10)
 
 # Domain selection
 tk.Label(top_frame, text="ウェブサイト選択:").pack(side="left", padx=5)
-dropdown = ttk.Combobox(top_frame, values=list(PREDEFINED_SITES.keys()), width=60)
+dropdown = ttk.Combobox(top_frame, values=SITE_LABELS, width=60)
 dropdown.pack(side="left", padx=5)
 
 def run_scan():
-    global spider, timer_running, start_time, elapsed_time, main_whois
+    global spider, timer_running, start_time, elapsed_time, main_whois, http_session, _last_elapsed
+    from spider import Spider
+    from whois_checker import WhoisChecker
+
+    settings = runtime_settings()
     api_key = settings["api_key"]
     if not api_key:
         messagebox.showerror("エラー", "API Keyを設定してください")
@@ -206,37 +328,32 @@ def run_scan():
     url = PREDEFINED_SITES[selected_label]
 
     output_table.delete(*output_table.get_children())
+    exported_rows.clear()
+    log_buffer.clear()
     log_box.delete("1.0", "end")
     status_label.config(text="スキャン中...", fg="blue")
     export_button.config(state="disabled")
     progress.start()
 
-    # Get current resource settings
-    current_resources = {
-        "images": settings["crawl_resources"].get("images", False),
-        "documents": settings["crawl_resources"].get("documents", False),
-        "stylesheets": settings["crawl_resources"].get("stylesheets", False),
-        "scripts": settings["crawl_resources"].get("scripts", False),
-        "media": settings["crawl_resources"].get("media", False),
-        "archives": settings["crawl_resources"].get("archives", False)
-    }
-
+    http_session = build_session()
     spider = Spider(
-        base_url=url, 
+        base_url=url,
         log_callback=log,
         max_depth=settings["max_depth"],
         delay=settings["crawl_delay"],
-        crawl_resources=current_resources  # Pass the current resource settings
+        crawl_resources=settings["crawl_resources"],
+        session=http_session
     )
-    whois_checker = WhoisChecker(api_key=api_key)
+    whois_checker = WhoisChecker(api_key=api_key, session=http_session)
     timer_running = True
-    start_time = time.time()
+    start_time = time.monotonic()
     elapsed_time = 0
+    _last_elapsed = -1
     update_timer()
 
     # Get main domain WHOIS info
     main_domain = get_domain(url)
-    main_whois = whois_checker.check_domain(main_domain)
+    main_whois = cached_whois(whois_checker, main_domain)
     print("main_whois", main_whois)
 
     # Start the crawl in a separate thread
@@ -247,13 +364,13 @@ def pause_scan():
     if spider:
         spider.pause()
         timer_running = False
-        elapsed_time += int(time.time() - start_time)
+        elapsed_time += int(time.monotonic() - start_time)
 
 def resume_scan():
     global spider, timer_running, start_time
     if spider:
         spider.resume()
-        start_time = time.time()
+        start_time = time.monotonic()
         timer_running = True
         update_timer()
 
@@ -272,46 +389,14 @@ def cancel_scan():
             progress.stop()
             
             # Process the results we managed to collect
-            if results:
-                seen_domains = {}
-                error_count = 0
-                for r in results:
-                    try:
-                        url = r['url']
-                        status = r['status']
-                        referrer = r['referrer']
-                        type_ = r['type']
-                        domain = r['domain']
-                        depth = r['depth']
-
-                        if type_ == "external":
-                            if domain not in seen_domains:
-                                if 'global_whois_checker' in globals():
-                                    whois = global_whois_checker.check_domain(domain)
-                                else:
-                                    whois = {"status": "Unknown", "owner": "Unknown"}
-                                seen_domains[domain] = whois
-                            else:
-                                whois = seen_domains[domain]
-                        else:
-                            whois = main_whois
-
-                        is_error = isinstance(status, int) and status >= 400 or status == "Request Failed"
-                        row_text = f"[{error_count + 1}] {url}" if is_error else url
-                        row = output_table.insert("", "end", values=(
-                            row_text, status, referrer, type_, domain, whois["status"], whois["owner"]
-                        ))
-                        if is_error:
-                            output_table.item(row, tags=("error",))
-                            error_count += 1
-                    except Exception as e:
-                        log(f"Error processing result for {r.get('url', 'unknown')}: {str(e)}")
-                        continue
-
-                status_label.config(text=f"キャンセルされました：{len(results)} 件を検査、問題のあるリンク {error_count} 件", fg="red")
-                # Only enable export if we have results
-                if len(results) > 0:
-                    export_button.config(state="normal")
+            result_count = len(results['url'])
+            if result_count:
+                whois_map = fetch_whois_map(globals().get('global_whois_checker'), results)
+                rows, error_count = build_result_rows(results, whois_map)
+                insert_result_rows(rows)
+
+                status_label.config(text=f"キャンセルされました：{result_count} 件を検査、問題のあるリンク {error_count} 件", fg="red")
+                export_button.config(state="normal")
             else:
                 status_label.config(text="キャンセルされました（結果なし）", fg="red")
                 export_button.config(state="disabled")
@@ -323,7 +408,9 @@ def cancel_scan():
             # Cleanup after processing results
             if spider:
                 spider._cleanup()
-            
+            if http_session:
+                http_session.close()
+
             # Update UI to show final state
             app.update()
 
@@ -332,12 +419,16 @@ def export_to_excel():
     if not file_path:
         return
 
-    wb = Workbook()
-    ws = wb.active
+    from openpyxl import Workbook
+
+    # Write-only mode streams each appended row to the xlsx zip stream
+    # instead of keeping every cell in memory until save()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
     ws.append(["URL", "Status", "Referrer", "Type", "Domain", "WHOIS Status", "Registrant"])
 
-    for row_id in output_table.get_children():
-        ws.append(output_table.item(row_id)["values"])
+    for values in exported_rows:
+        ws.append(list(values))
 
     wb.save(file_path)
     messagebox.showinfo("保存完了", f"Excelファイルとして保存されました:\n{file_path}")
@@ -377,115 +468,146 @@ log_scroll = ttk.Scrollbar(log_frame, command=log_box.yview)
 log_box.configure(yscrollcommand=log_scroll.set)
 log_scroll.pack(side="right", fill="y")
 
+# Log messages are buffered and flushed in one insert every 50 ms instead of
+# paying an insert + scroll recompute per message while the crawl is running.
+# deque.append/popleft are atomic, so worker threads can log without a lock.
+log_buffer = deque()
+
 def log(message):
-    log_box.insert("end", f"{message}\n")
-    log_box.see("end")
+    # Safe to call from any thread; the widget update happens in flush_logs
+    log_buffer.append(message)
+
+def flush_logs():
+    if log_buffer:
+        messages = []
+        while log_buffer:
+            try:
+                messages.append(log_buffer.popleft())
+            except IndexError:
+                break
+        log_box.insert("end", "\n".join(messages) + "\n")
+        log_box.see("end")
+    app.after(50, flush_logs)
 
 # Global vars
 spider = None
+http_session = None
 timer_running = False
 start_time = 0
 elapsed_time = 0
+_last_elapsed = -1
 
 def update_timer():
+    global _last_elapsed
     if timer_running:
-        elapsed = int(time.time() - start_time + elapsed_time)
-        timer_label.config(text=f"経過時間: {elapsed} 秒")
+        # monotonic() is immune to wall-clock jumps; only touch the label
+        # when the displayed value actually changes
+        elapsed = int(time.monotonic() - start_time + elapsed_time)
+        if elapsed != _last_elapsed:
+            timer_label.config(text=f"経過時間: {elapsed} 秒")
+            _last_elapsed = elapsed
         app.after(1000, update_timer)
 
-def start_scan():
-    global spider, timer_running, start_time, elapsed_time
-    api_key = settings["api_key"]
-    if not api_key:
-        messagebox.showerror("エラー", "API Keyを設定してください")
-        return
+# Tk is not thread-safe, so worker threads never touch widgets directly.
+# They queue callables here and the main loop drains them via app.after.
+ui_queue = queue.Queue()
 
-    selected_label = dropdown.get()
-    if not selected_label:
-        messagebox.showerror("エラー", "サイトを選択してください")
-        return
-    url = PREDEFINED_SITES[selected_label]
+def ui_call(fn, *args):
+    """Marshal a widget call from a worker thread onto the Tk main loop"""
+    ui_queue.put((fn, args))
 
-    output_table.delete(*output_table.get_children())
-    log_box.delete("1.0", "end")
-    status_label.config(text="スキャン中...", fg="blue")
-    export_button.config(state="disabled")
-    progress.start()
+def pump_ui_queue():
+    while True:
+        try:
+            fn, args = ui_queue.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Error in UI update: {e}")
+    app.after(30, pump_ui_queue)
 
-    spider = Spider(
-        base_url=url, 
-        log_callback=log,
-        max_depth=settings["max_depth"],
-        delay=settings["crawl_delay"],
-        crawl_resources=settings["crawl_resources"]
-    )
-    whois_checker = WhoisChecker(api_key=api_key)
-    timer_running = True
-    start_time = time.time()
-    elapsed_time = 0
-    update_timer()
+RESULT_INSERT_BATCH = 500
+
+# Plain-Python copy of the rows shown in the Treeview, so exporting doesn't
+# have to pull every row back out of Tk one item() call at a time
+exported_rows = []
 
-    threading.Thread(target=run_scan, args=(url, whois_checker), daemon=True).start()
+def build_result_rows(results, whois_map):
+    """Build (values, tags) tuples for all results using prefetched WHOIS data.
+
+    Results arrive from Spider as parallel column lists, so the loop just
+    zips them — no per-row dict lookups and no exception handling.
+    """
+    unknown_whois = {"status": "Unknown", "owner": "Unknown"}
+    rows = []
+    error_count = 0
+    for url, status, referrer, type_, domain, is_error in zip(
+            results['url'], results['status'], results['referrer'],
+            results['type'], results['domain'], results['is_error']):
+
+        if type_ == "external":
+            whois = whois_map.get(domain) or unknown_whois
+        else:
+            whois = main_whois
+
+        row_text = f"[{error_count + 1}] {url}" if is_error else url
+        rows.append((
+            (row_text, status, referrer, type_, domain, whois["status"], whois["owner"]),
+            ("error",) if is_error else ()
+        ))
+        if is_error:
+            error_count += 1
+    return rows, error_count
+
+def insert_result_rows(rows):
+    """Insert prepared rows into the results table in batches so large result
+    sets don't stall the UI with one redraw per row"""
+    exported_rows[:] = [values for values, tags in rows]
+
+    def insert_batch(start):
+        for values, tags in rows[start:start + RESULT_INSERT_BATCH]:
+            output_table.insert("", "end", values=values, tags=tags)
+        if start + RESULT_INSERT_BATCH < len(rows):
+            app.after_idle(insert_batch, start + RESULT_INSERT_BATCH)
+    insert_batch(0)
 
 def run_scan_thread(url, whois_checker):
     global spider, timer_running, elapsed_time, main_whois, global_whois_checker
     global_whois_checker = whois_checker  # Store whois_checker globally
     spider.crawl(url)
-    
-    # Wait for the crawl to complete
-    while True:
-        # Check if any threads are still alive
-        with spider.thread_lock:
-            active_threads = sum(1 for t in spider.threads if t.is_alive())
-            if active_threads == 0:
-                break
-        time.sleep(1)  # Wait a bit before checking again
-    
+
+    # Wait for the crawl to complete by joining the workers directly instead
+    # of polling them once a second
+    spider.join()
+
+    # A user cancel also completes the workers; cancel_scan owns the results
+    # in that case, so bail out before touching (or racing) them here
+    if spider.cancelled.is_set():
+        return
+
     # Get the results after crawl is complete
     results = spider.get_results()
-    log(f"クロール完了: {len(results)} 件のURLを検査しました")
+    result_count = len(results['url'])
+    log(f"クロール完了: {result_count} 件のURLを検査しました")
 
-    seen_domains = {}
-    error_count = 0
-    for r in results:
-        try:
-            url = r['url']
-            status = r['status']
-            referrer = r['referrer']
-            type_ = r['type']
-            domain = r['domain']
-            depth = r['depth']
-
-            if type_ == "external":
-                if domain not in seen_domains:
-                    whois = whois_checker.check_domain(domain)
-                    seen_domains[domain] = whois
-                else:
-                    whois = seen_domains[domain]
-            else:
-                whois = main_whois
-
-            is_error = isinstance(status, int) and status >= 400 or status == "Request Failed"
-            row_text = f"[{error_count + 1}] {url}" if is_error else url
-            row = output_table.insert("", "end", values=(
-                row_text, status, referrer, type_, domain, whois["status"], whois["owner"]
-            ))
-            if is_error:
-                output_table.item(row, tags=("error",))
-                error_count += 1
-        except Exception as e:
-            log(f"Error processing result for {r.get('url', 'unknown')}: {str(e)}")
-            continue
+    whois_map = fetch_whois_map(whois_checker, results)
+    rows, error_count = build_result_rows(results, whois_map)
+    ui_call(insert_result_rows, rows)
 
     timer_running = False
-    elapsed_time += int(time.time() - start_time)
-    status_label.config(text=f"完了：{len(results)} 件を検査、問題のあるリンク {error_count} 件", fg="green")
-    export_button.config(state="normal")
-    progress.stop()
+    elapsed_time += int(time.monotonic() - start_time)
+    status_text = f"完了：{result_count} 件を検査、問題のあるリンク {error_count} 件"
+    ui_call(lambda: status_label.config(text=status_text, fg="green"))
+    ui_call(lambda: export_button.config(state="normal"))
+    ui_call(progress.stop)
     
     # Cleanup after processing results
     if spider:
         spider._cleanup()
+    if http_session:
+        http_session.close()
 
 # Controls
 progress = ttk.Progressbar(app, mode="indeterminate")
@@ -497,4 +619,6 @@ timer_label.pack(fill="x", padx=20)
 status_label = tk.Label(app, text="ステータス: 待機中", anchor="w")
 status_label.pack(fill="x", padx=20, pady=5)
 
+app.after(30, pump_ui_queue)
+app.after(50, flush_logs)
 app.mainloop()
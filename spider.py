@@ -1,7 +1,12 @@
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from pybloom_live import ScalableBloomFilter
 from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-from utils import is_valid_url, get_domain, is_external_url
+from urllib.robotparser import RobotFileParser
+import lxml.html
+from lxml import etree
+from utils import is_valid_url, get_domain, is_external_domain
 import time
 import queue
 import threading
@@ -11,12 +16,45 @@ import sqlite3
 import os
 import tempfile
 
+# Cap on how much HTML we download and parse per page; anything larger is
+# recorded by status only
+MAX_HTML_BYTES = 2 * 1024 * 1024
+
+# Sentinel put on the results queue to tell the writer thread to drain,
+# commit, and close its connection
+_WRITER_SHUTDOWN = object()
+
+# One precompiled XPath pulls every candidate link attribute out of the tree
+# in a single C-level pass; rel=nofollow tags are excluded in the expression
+# itself so Python never iterates over them
+# The charset parameter may be quoted (charset="shift_jis") per RFC 9110
+_CHARSET_RE = re.compile(r'charset="?\'?([\w\-]+)', re.I)
+_FRAG_RE = re.compile(r'#.*')
+_SKIP_SCHEME_RE = re.compile(r'^(?:javascript|mailto|tel):|^#', re.I)
+
+_LINK_XPATH = etree.XPath(
+    "//a[not(contains(translate(@rel,'NOFLW','noflw'),'nofollow'))]/@href"
+    " | //img/@src"
+    " | //script/@src"
+    " | //link[not(contains(translate(@rel,'NOFLW','noflw'),'nofollow'))]/@href"
+)
+
 class Spider:
-    def __init__(self, base_url, log_callback=None, max_depth=3, delay=1.0, max_threads=5, crawl_resources=None, timeout=None):
+    def __init__(self, base_url, log_callback=None, max_depth=3, delay=1.0, max_threads=5, crawl_resources=None, timeout=None, session=None):
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
             "Accept": "*/*",
         }
+        # Reuse the caller's session when provided so all requests share one
+        # connection pool (keep-alive instead of a new TCP+TLS handshake per URL).
+        # When used standalone, build our own session sized to the worker count.
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=max_threads, pool_maxsize=max_threads * 4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
         self.base_url = base_url
         self.base_domain = get_domain(base_url)
         self.log = log_callback or (lambda msg: None)
@@ -29,20 +67,44 @@ class Spider:
         self.start_time = time.time()
         self.error_count = 0
         
-        # Thread control
-        self.paused = threading.Event()
+        # Thread control. _unpaused is set while the crawl is live; pause()
+        # clears it so workers block in wait() instead of spinning, and
+        # cancel() re-sets it so a paused worker wakes and sees the flag.
+        # _url_cond is notified on every enqueue so idle workers wake as
+        # soon as new work arrives instead of sleeping a fixed interval.
+        self._unpaused = threading.Event()
+        self._unpaused.set()
         self.cancelled = threading.Event()
-        self.threads = []
+        self._url_cond = threading.Condition()
+        self._executor = None
+        self.futures = []
         self.thread_lock = threading.Lock()
-        self.visited_lock = threading.Lock()
-        
-        # URL tracking
-        self.visited = set()
+
+        # Fetched HTML is handed to a small dedicated parse pool so fetch
+        # workers go straight back to the network after a download. The
+        # bounded queue applies backpressure if parsing falls behind; two
+        # parsers are plenty since lxml parsing is serialized by the GIL
+        # far less than network waits are.
+        self.parse_queue = queue.Queue(maxsize=max_threads * 4)
+        self._parse_executor = None
+        self.parse_futures = []
+        self.parse_workers = 2
+
+
+        # URL tracking — scalable Bloom filters need only a few bytes per
+        # URL for dedup instead of retaining every URL string in a set; the
+        # 1e-7 false-positive rate means the odd URL may be skipped as
+        # "already seen", which is a fine trade for a link checker. The
+        # filter is striped across shards, each with its own lock, so
+        # workers checking different URLs almost never contend.
+        self.visited_locks = [threading.Lock() for _ in range(self._VISITED_SHARDS)]
+        self.visited_shards = self._new_visited_shards()
         self.visited_count = 0
+        self._count_lock = threading.Lock()
         
         # Results handling
         self.results_queue = queue.Queue()
-        self.batch_size = 100  # Number of results to batch process
+        self.batch_size = 1000  # Max results per commit; commits are the expensive part
         self.batch_lock = threading.Lock()
         
         # Resource settings - use provided settings without defaults
@@ -57,7 +119,27 @@ class Spider:
             "media": ['.mp3', '.mp4', '.wav', '.ogg', '.webm', '.mov', '.avi', '.flv'],
             "archives": ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2']
         }
-        
+
+        # Precompiled lookup: classifying a URL is one regex search plus one
+        # dict get instead of scanning every category's extension list
+        self._ext_to_type = {ext.lstrip('.'): rtype
+                             for rtype, exts in self.resource_extensions.items()
+                             for ext in exts}
+        self._ext_re = re.compile(
+            r'\.(' + '|'.join(map(re.escape, self._ext_to_type)) + r')(?:$|[?#])', re.I)
+
+        # Second pattern covering only the enabled resource types, so the
+        # per-link check is a single regex search instead of classify +
+        # dict lookup + settings lookup; None when no resources are enabled
+        enabled_exts = [ext.lstrip('.')
+                        for rtype, exts in self.resource_extensions.items()
+                        if self.crawl_resources.get(rtype, False)
+                        for ext in exts]
+        self._enabled_resource_re = re.compile(
+            r'\.(' + '|'.join(map(re.escape, enabled_exts)) + r')(?:$|[?#])',
+            re.I) if enabled_exts else None
+
+
         # Initialize database
         self.db_path = os.path.join(tempfile.gettempdir(), f"seo_spider_{int(time.time())}.db")
         self._init_database()
@@ -66,23 +148,69 @@ class Spider:
         self.batch_processor = threading.Thread(target=self._process_batches, daemon=True)
         self.batch_processor.start()
         
-        # Queue for URLs to crawl
-        self.url_queue = queue.PriorityQueue()
+        # Queue for URLs to crawl. Discovery order is already breadth-first
+        # (children are always enqueued at parent depth + 1), so a plain FIFO
+        # gives the same ordering as a priority queue without the heap and
+        # its extra lock hold time per put/get.
+        self.url_queue = queue.Queue()
         self.domain_last_request = {}
         
         # Track robots.txt rules
-        self.robots_rules = {}
+        self.robots = RobotFileParser()
         self._load_robots_txt()
         
         # Add the base URL to the queue with highest priority (depth 0)
-        self.url_queue.put((0, self.base_url, "root"))
+        self._enqueue_url((0, self.base_url, "root"))
         
         # Log resource settings
         self.log(f"Resource settings: {self.crawl_resources}")
     
+    _VISITED_SHARDS = 64  # power of two so the shard index is one AND
+
+    @staticmethod
+    def _new_visited_filter():
+        # Per-shard capacity; URLs spread evenly across shards, and the
+        # filters grow on their own past this anyway
+        return ScalableBloomFilter(initial_capacity=8192, error_rate=1e-7,
+                                   mode=ScalableBloomFilter.LARGE_SET_GROWTH)
+
+    def _new_visited_shards(self):
+        return [self._new_visited_filter() for _ in range(self._VISITED_SHARDS)]
+
+    def _seen(self, url):
+        """Check whether a URL was (probably) already visited"""
+        i = hash(url) & (self._VISITED_SHARDS - 1)
+        with self.visited_locks[i]:
+            return url in self.visited_shards[i]
+
+    def _mark_visited(self, url):
+        """Atomically check-and-mark a URL; returns True if already seen"""
+        i = hash(url) & (self._VISITED_SHARDS - 1)
+        with self.visited_locks[i]:
+            # add() returns True when the URL was (probably) seen before
+            return self.visited_shards[i].add(url)
+
+    # Per-connection performance settings; WAL itself is set once in
+    # _init_database because the journal mode persists in the database file
+    _CONNECTION_PRAGMAS = (
+        "PRAGMA busy_timeout = 30000",
+        "PRAGMA synchronous = NORMAL",   # safe with WAL; skips a fsync per commit
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -65536",    # 64 MB page cache
+        "PRAGMA mmap_size = 268435456",  # 256 MB
+    )
+
+    def _apply_pragmas(self, conn):
+        for pragma in self._CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
     def _init_database(self):
         """Initialize SQLite database for storing results"""
         conn = sqlite3.connect(self.db_path)
+        # WAL lets the GUI read results while the batch writer is committing
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA wal_autocheckpoint = 1000")
+        self._apply_pragmas(conn)
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS results (
@@ -109,13 +237,14 @@ class Spider:
         # Wait a bit to ensure all connections are closed
         time.sleep(1)
         
-        # Try to delete the database file
+        # Try to delete the database file and its WAL sidecar files
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                if os.path.exists(self.db_path):
-                    os.remove(self.db_path)
-                    break
+                for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+                    if os.path.exists(path):
+                        os.remove(path)
+                break
             except Exception as e:
                 if attempt < max_retries - 1:
                     time.sleep(1)  # Wait before retrying
@@ -126,31 +255,27 @@ class Spider:
         """Load robots.txt rules for the base domain"""
         try:
             robots_url = f"https://{self.base_domain}/robots.txt"
-            response = requests.get(robots_url, headers=self.headers, timeout=15)
+            response = self.session.get(robots_url, headers=self.headers, timeout=15)
             if response.status_code == 200:
-                # Simple parsing of robots.txt
-                user_agent = None
-                for line in response.text.splitlines():
-                    line = line.strip().lower()
-                    if line.startswith("user-agent:"):
-                        user_agent = line[11:].strip()
-                    elif line.startswith("disallow:") and user_agent in ["*", "seo-spider"]:
-                        path = line[9:].strip()
-                        if path:
-                            self.robots_rules[path] = True
+                self.robots.parse(response.text.splitlines())
+            else:
+                # Missing/unreadable robots.txt means no restrictions; an
+                # unparsed RobotFileParser would deny every URL
+                self.robots.allow_all = True
         except Exception as e:
             self.log(f"Error loading robots.txt: {str(e)}")
-    
+            self.robots.allow_all = True
+
     def _is_allowed_by_robots(self, url):
         """Check if URL is allowed by robots.txt rules"""
-        parsed = urlparse(url)
-        path = parsed.path
-        
-        for rule in self.robots_rules:
-            if path.startswith(rule):
-                return False
-        return True
+        return self.robots.can_fetch("seo-spider", url)
     
+    def _enqueue_url(self, item):
+        """Queue a URL for crawling and wake a worker waiting for work"""
+        self.url_queue.put(item)
+        with self._url_cond:
+            self._url_cond.notify()
+
     def _respect_rate_limit(self, domain):
         """Implement rate limiting per domain"""
         current_time = time.time()
@@ -162,177 +287,230 @@ class Spider:
         self.domain_last_request[domain] = time.time()
     
     def _is_resource_url(self, url):
-        """Check if a URL is a resource based on its extension"""
-        # Remove query parameters and fragments
-        url = url.split('?')[0].split('#')[0]
-        url_lower = url.lower()
-        
-        for resource_type, extensions in self.resource_extensions.items():
-            if self.crawl_resources.get(resource_type, False):  # Only check enabled resource types
-                if any(url_lower.endswith(ext) for ext in extensions):
-                    return True
-        return False
+        """Check if a URL is an enabled resource based on its extension"""
+        return bool(self._enabled_resource_re and self._enabled_resource_re.search(url))
     
     def _normalize_url(self, url):
-        """Normalize URL to prevent duplicates"""
-        # Remove trailing slash
-        url = url.rstrip('/')
-        
-        # Remove URL fragments
-        url = url.split('#')[0]
-        
-        # Convert to lowercase
-        url = url.lower()
-        
-        return url
+        """Normalize URL to prevent duplicates (drop trailing slash and
+        fragment, lowercase)"""
+        return _FRAG_RE.sub('', url.rstrip('/')).lower()
     
     def _extract_links(self, url, html_content):
         """Extract all links from HTML content"""
         links = []
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        for tag in soup.find_all(['a', 'img', 'script', 'link']):
-            href = tag.get('href') or tag.get('src')
-            if not href:
-                continue
-                
-            if href.startswith(('javascript:', 'mailto:', 'tel:', '#')):
-                continue
-                
-            if tag.get('rel') and 'nofollow' in [r.lower() for r in tag.get('rel')]:
+        if not html_content or not html_content.strip():
+            return links
+        doc = lxml.html.fromstring(html_content)
+
+        for href in _LINK_XPATH(doc):
+            if _SKIP_SCHEME_RE.match(href):
                 continue
-                
+
             full_url = urljoin(url, href)
             if is_valid_url(full_url):
                 # Normalize URL
                 normalized_url = self._normalize_url(full_url)
-                
-                # Check if URL is already in queue or visited
-                if normalized_url not in self.visited:
-                    # Check if this is a resource URL
-                    resource_type = self._get_resource_type(normalized_url)
-                    if resource_type:
-                        # Only add resource URLs if their type is enabled
-                        if self.crawl_resources.get(resource_type, False):
-                            links.append(normalized_url)
-                            self.log(f"Adding resource URL ({resource_type}): {normalized_url}")
-                    else:
-                        # Always add non-resource URLs
-                        links.append(normalized_url)
+
+                # Enabled resources and regular pages are added; URLs
+                # matching a disabled resource extension are skipped
+                m = self._enabled_resource_re.search(normalized_url) \
+                    if self._enabled_resource_re else None
+                if m:
+                    links.append(normalized_url)
+                    self.log(f"Adding resource URL ({self._ext_to_type[m.group(1).lower()]}): {normalized_url}")
+                elif not self._ext_re.search(normalized_url):
+                    links.append(normalized_url)
         
         return links
     
     def _get_resource_type(self, url):
-        """Get the resource type of a URL"""
-        # Remove query parameters and fragments
-        url = url.split('?')[0].split('#')[0]
-        url_lower = url.lower()
-        
-        for resource_type, extensions in self.resource_extensions.items():
-            if any(url_lower.endswith(ext) for ext in extensions):
-                return resource_type
-        return None
+        """Get the resource type of a URL, or None for regular pages"""
+        m = self._ext_re.search(url)
+        return self._ext_to_type[m.group(1).lower()] if m else None
     
+    @staticmethod
+    def _rows_to_columns(rows):
+        """Convert results table rows into a dict of parallel column lists.
+
+        The columnar layout lets consumers scan one field (statuses,
+        domains, ...) without paying seven dict lookups per row.
+        """
+        if rows:
+            urls, statuses, referrers, types_, domains, depths = (list(c) for c in zip(*rows))
+        else:
+            urls, statuses, referrers, types_, domains, depths = [], [], [], [], [], []
+        is_errors = [(isinstance(s, int) and s >= 400) or s == "Request Failed" for s in statuses]
+        return {
+            'url': urls,
+            'status': statuses,
+            'referrer': referrers,
+            'type': types_,
+            'domain': domains,
+            'depth': depths,
+            'is_error': is_errors,
+        }
+
     def _get_db_connection(self):
         """Get a new database connection for the current thread"""
         try:
-            conn = sqlite3.connect(self.db_path, timeout=30)  # Add timeout
-            conn.execute("PRAGMA busy_timeout = 30000")  # Set busy timeout
+            # isolation_level=None leaves transaction control to explicit
+            # BEGIN/COMMIT statements instead of sqlite3's implicit handling
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._apply_pragmas(conn)
             return conn
         except Exception as e:
             self.log(f"Error creating database connection: {str(e)}")
             raise
-    
-    def _process_batches(self):
-        """Process results in batches and write to SQLite"""
-        batch = []
-        while not self.cancelled.is_set():
+
+    def _get_read_connection(self):
+        """Open a read-only connection; result queries never take the write lock"""
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    def _drain_results_queue(self, batch):
+        """Move whatever is already queued into batch, up to batch_size.
+
+        Returns True if the shutdown sentinel was encountered.
+        """
+        while len(batch) < self.batch_size:
             try:
-                # Get result from queue with timeout
-                result = self.results_queue.get(timeout=1.0)
-                batch.append(result)
-                
-                # Process batch if it reaches the batch size
-                if len(batch) >= self.batch_size:
-                    self._write_batch_to_db(batch)
-                    batch = []
-                    
+                item = self.results_queue.get_nowait()
             except queue.Empty:
-                # If queue is empty but we have a partial batch, process it
-                if batch:
+                return False
+            if item is _WRITER_SHUTDOWN:
+                return True
+            batch.append(item)
+        return False
+
+    def _process_batches(self):
+        """Single-writer thread: consume queued results and write them in batches"""
+        # This thread owns the only connection that ever inserts results, so
+        # batches pay no per-batch connection setup or PRAGMA replay
+        self._writer_conn = self._get_db_connection()
+        try:
+            shutdown = False
+            while not shutdown and not self.cancelled.is_set():
+                try:
+                    # Block for the first result, then sweep up everything else
+                    # already queued so each commit covers as many rows as possible
+                    item = self.results_queue.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                if item is _WRITER_SHUTDOWN:
+                    break
+                batch = [item]
+                shutdown = self._drain_results_queue(batch)
+                try:
                     self._write_batch_to_db(batch)
-                    batch = []
-                continue
-            except Exception as e:
-                self.log(f"Error in batch processor: {str(e)}")
-                continue
-        
-        # Process any remaining results
-        if batch:
-            self._write_batch_to_db(batch)
-        
+                except Exception as e:
+                    self.log(f"Error in batch processor: {str(e)}")
+
+            # Process any results still queued at shutdown/cancellation
+            batch = []
+            self._drain_results_queue(batch)
+            if batch:
+                self._write_batch_to_db(batch)
+        finally:
+            self._writer_conn.close()
+
         # Ensure all results are written to database
         self.log("Batch processor finished processing all results")
-        
-        # Wait a bit to ensure all database operations are complete
-        time.sleep(1)
     
     def _write_batch_to_db(self, batch):
-        """Write a batch of results to the database"""
-        conn = None
+        """Write a batch of results through the long-lived writer connection"""
         try:
-            conn = self._get_db_connection()
-            cursor = conn.cursor()
+            cursor = self._writer_conn.cursor()
+            # Take the write lock up front and commit the whole batch at once
+            cursor.execute("BEGIN IMMEDIATE")
             cursor.executemany('''
                 INSERT OR REPLACE INTO results (url, status, referrer, type, domain, depth)
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', [(r['url'], r['status'], r['referrer'], r['type'], r['domain'], r['depth']) for r in batch])
-            conn.commit()
+            self._writer_conn.commit()
             self.log(f"Stored {len(batch)} results in database")
         except Exception as e:
+            try:
+                self._writer_conn.rollback()
+            except sqlite3.Error:
+                pass
             self.log(f"Error writing batch to database: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
     
     def _crawl_url(self, url, depth, referrer):
         """Crawl a single URL and add discovered links to the queue"""
         if self.cancelled.is_set():
             return
             
-        while self.paused.is_set():
-            if self.cancelled.is_set():
-                return
-            time.sleep(0.1)
-            
+        # Block here while paused; returns immediately when running
+        self._unpaused.wait()
+        if self.cancelled.is_set():
+            return
+
+
         domain = get_domain(url)
         self._respect_rate_limit(domain)
         
         self.log(f"検査中: {url} (深さ: {depth})")
-        
+
+        # domain is already extracted above for rate limiting; compare it
+        # directly rather than re-parsing the URL
+        url_type = "external" if is_external_domain(self.base_domain, domain) else "internal"
+
         # Retry logic
         max_retries = 3
         retry_delay = 1.0
-        response = None
         status = "Request Failed"
-        content_type = ""
-        
+        html = None
+
         for attempt in range(max_retries):
             try:
-                response = requests.get(url, headers=self.headers, timeout=60)
+                # Stream so we can decide from the headers whether the body is
+                # worth downloading at all (外部リンク, resources, huge files)
+                response = self.session.get(url, headers=self.headers, timeout=60, stream=True)
                 status = response.status_code
                 content_type = response.headers.get('Content-Type', '')
+                try:
+                    content_length = int(response.headers.get('Content-Length') or 0)
+                except ValueError:
+                    # Broken proxies send things like "1234, 1234"; treat the
+                    # header as absent rather than dropping the result
+                    content_length = 0
+
+                if (url_type == "internal" and status == 200 and 'text/html' in content_type
+                        and depth < self.max_depth and content_length <= MAX_HTML_BYTES):
+                    # iter_content (unlike raw.read) wraps mid-body urllib3
+                    # errors in RequestException subclasses, so a connection
+                    # dropping during the read stays inside this retry loop
+                    chunks = []
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=65536):
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size > MAX_HTML_BYTES:
+                            break
+                    if size <= MAX_HTML_BYTES:
+                        # Take the charset straight from the header we already
+                        # have; response.encoding falls back to ISO-8859-1 and
+                        # can trigger a chardet scan of the whole body
+                        raw = b''.join(chunks)
+                        charset_match = _CHARSET_RE.search(content_type)
+                        charset = charset_match.group(1) if charset_match else 'utf-8'
+                        try:
+                            html = raw.decode(charset, errors='replace')
+                        except LookupError:
+                            html = raw.decode('utf-8', errors='replace')
+                response.close()
                 break
             except requests.exceptions.RequestException as e:
+                status = "Request Failed"
+                html = None
                 if attempt < max_retries - 1:
                     self.log(f"Retry {attempt + 1}/{max_retries} for {url}: {str(e)}")
                     time.sleep(retry_delay * (attempt + 1))
                 else:
                     self.log(f"Error crawling {url} after {max_retries} attempts: {str(e)}")
                     self.error_count += 1
-        
-        url_type = "external" if is_external_url(self.base_domain, url) else "internal"
-        
+
         # Store result in queue
         result = {
             'url': url,
@@ -343,18 +521,53 @@ class Spider:
             'depth': depth
         }
         self.results_queue.put(result)
-        
-        # Only follow links if it's an internal page and we haven't reached max depth
-        if url_type == "internal" and status == 200 and 'text/html' in content_type and depth < self.max_depth:
-            if response and response.text:
-                try:
-                    links = self._extract_links(url, response.text)
-                    for link in links:
-                        if link not in self.visited and self._is_allowed_by_robots(link):
-                            self.url_queue.put((depth + 1, link, url))
-                except Exception as e:
-                    self.log(f"Error extracting links from {url}: {str(e)}")
-                    self.error_count += 1
+
+        # Only follow links from internal HTML pages below max depth (html is
+        # only set when all of those conditions held). Parsing happens on the
+        # parse pool so this worker can return to the network immediately.
+        if html:
+            self._offer_parse((url, html, depth))
+
+    def _offer_parse(self, item):
+        """Put a fetched page on the parse queue, backing off while full"""
+        while not self.cancelled.is_set():
+            try:
+                self.parse_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _parse_worker(self):
+        """Parse-pool worker: extract links from fetched pages and enqueue them"""
+        while not self.cancelled.is_set():
+            try:
+                url, html, depth = self.parse_queue.get(timeout=0.5)
+            except queue.Empty:
+                # Exit without touching thread_lock on cancel; cancel() may
+                # be waiting on this future
+                if self.cancelled.is_set():
+                    break
+                # Once every fetch worker has finished, nothing can produce
+                # more pages, so drain out
+                with self.thread_lock:
+                    fetchers_done = all(f.done() for f in self.futures)
+                if fetchers_done and self.parse_queue.empty():
+                    break
+                continue
+            try:
+                links = self._extract_links(url, html)
+                # Pre-filter against the sharded visited filter; each check
+                # only touches its own shard's lock. _worker still does the
+                # authoritative check-and-mark when dequeuing
+                new_links = [link for link in links if not self._seen(link)]
+                for link in new_links:
+                    if self._is_allowed_by_robots(link):
+                        self._enqueue_url((depth + 1, link, url))
+            except Exception as e:
+                self.log(f"Error extracting links from {url}: {str(e)}")
+                self.error_count += 1
+            finally:
+                self.parse_queue.task_done()
     
     def _check_timeout(self):
         """Check if the global timeout has been reached"""
@@ -374,12 +587,12 @@ class Spider:
                 # Get URL from queue with timeout to allow checking cancelled flag
                 depth, url, referrer = self.url_queue.get(timeout=1)
                 
-                # Skip if already visited
-                with self.visited_lock:
-                    if url in self.visited:
-                        self.url_queue.task_done()
-                        continue
-                    self.visited.add(url)
+                # Skip if already visited; check-and-mark is one call under
+                # the URL's own shard lock
+                if self._mark_visited(url):
+                    self.url_queue.task_done()
+                    continue
+                with self._count_lock:
                     self.visited_count += 1
                     
                 # Crawl the URL
@@ -393,10 +606,16 @@ class Spider:
                 
             except queue.Empty:
                 # Queue is empty, check if we should exit
-                if self.url_queue.empty() and not self.paused.is_set():
-                    # Double check if any other thread might add more URLs
-                    time.sleep(1)  # Give other threads a chance to add URLs
-                    if self.url_queue.empty() and not self.paused.is_set():
+                if self.url_queue.empty() and self._unpaused.is_set():
+                    # Wait for another thread to enqueue more work; the
+                    # condition is notified on every put, so this wakes as
+                    # soon as a URL arrives instead of after a fixed sleep
+                    with self._url_cond:
+                        self._url_cond.wait(timeout=1.0)
+                    # Pending parses may still produce new URLs, so only
+                    # exit once the parse queue has fully drained too
+                    if (self.url_queue.empty() and self._unpaused.is_set()
+                            and self.parse_queue.unfinished_tasks == 0):
                         break
             except Exception as e:
                 self.log(f"Error in worker thread: {str(e)}")
@@ -408,9 +627,9 @@ class Spider:
     def crawl(self, url=None):
         """Start the crawling process"""
         if url:
-            self.url_queue = queue.PriorityQueue()
-            self.url_queue.put((0, url, "root"))
-            self.visited.clear()
+            self.url_queue = queue.Queue()
+            self._enqueue_url((0, url, "root"))
+            self.visited_shards = self._new_visited_shards()
             
             # Clear results table using thread-local connection
             conn = self._get_db_connection()
@@ -419,25 +638,62 @@ class Spider:
             conn.commit()
             conn.close()
         
-        # Start worker threads
+        # Start worker futures on a shared pool; the executor reuses its
+        # threads across resume() restarts instead of spawning fresh ones
         with self.thread_lock:
-            self.threads = []
-            # Always start max_threads number of threads, regardless of initial queue size
-            for _ in range(self.max_threads):
-                thread = threading.Thread(target=self._worker, daemon=True)
-                thread.start()
-                self.threads.append(thread)
-            
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_threads,
+                                                    thread_name_prefix="spider-worker")
+            # Always start max_threads number of workers, regardless of initial queue size
+            self.futures = [self._executor.submit(self._worker)
+                            for _ in range(self.max_threads)]
+            # Parsers must be submitted after the fetch futures exist, since
+            # they treat "all fetchers done" as their drain-out signal
+            if self._parse_executor is None:
+                self._parse_executor = ThreadPoolExecutor(max_workers=self.parse_workers,
+                                                          thread_name_prefix="spider-parser")
+            self.parse_futures = [self._parse_executor.submit(self._parse_worker)
+                                  for _ in range(self.parse_workers)]
+
             # Log initial status
             self.log(f"クロールを開始しました。最大深度: {self.max_depth}, スレッド数: {self.max_threads}")
-            
-            # Don't wait for threads to complete here
+
+            # Don't wait for workers to complete here
             # Let the main thread continue while workers run in background
     
+    def _shutdown_executors(self):
+        """Release both pools' idle threads; must hold thread_lock"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=False)
+            self._parse_executor = None
+
+    def join(self, timeout=None):
+        """Block until every worker future has finished.
+
+        Re-snapshots under the lock because resume() can submit a fresh
+        batch of workers after the first one drains. Shuts both pools
+        down once nothing is pending; each scan builds a fresh Spider,
+        so idle pool threads would otherwise outlive the crawl.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self.thread_lock:
+                pending = [f for f in self.futures + self.parse_futures if not f.done()]
+                if not pending:
+                    self._shutdown_executors()
+                    return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            wait_futures(pending, timeout=remaining)
+
     def pause(self):
         """Pause the crawling process"""
         if not self.cancelled.is_set():
-            self.paused.set()
+            self._unpaused.clear()
             self.log("一時停止しました。")
         else:
             self.log("キャンセルされたため、一時停止できません。")
@@ -445,54 +701,59 @@ class Spider:
     def resume(self):
         """Resume the crawling process"""
         if not self.cancelled.is_set():
-            self.paused.clear()
+            self._unpaused.set()
             self.log("再開しました。")
             
-            # Restart worker threads if needed
+            # Resubmit workers if the previous batch already drained out;
+            # recreate the pools in case join() has already released them
             with self.thread_lock:
-                active_threads = sum(1 for t in self.threads if t.is_alive())
-                if active_threads == 0 and not self.url_queue.empty():
-                    self.threads = []
-                    for _ in range(min(self.max_threads, self.url_queue.qsize())):
-                        thread = threading.Thread(target=self._worker, daemon=True)
-                        thread.start()
-                        self.threads.append(thread)
+                if all(f.done() for f in self.futures) and not self.url_queue.empty():
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_threads,
+                                                            thread_name_prefix="spider-worker")
+                    self.futures = [self._executor.submit(self._worker)
+                                    for _ in range(min(self.max_threads, self.url_queue.qsize()))]
+                    if all(f.done() for f in self.parse_futures):
+                        if self._parse_executor is None:
+                            self._parse_executor = ThreadPoolExecutor(max_workers=self.parse_workers,
+                                                                      thread_name_prefix="spider-parser")
+                        self.parse_futures = [self._parse_executor.submit(self._parse_worker)
+                                              for _ in range(self.parse_workers)]
         else:
             self.log("キャンセルされたため、再開できません。")
     
     def cancel(self):
         """Cancel the crawling process"""
         self.cancelled.set()
-        self.paused.clear()  # Ensure threads can exit
-        
-        # Wait for threads to finish
+        self._unpaused.set()  # Wake any paused workers so they can exit
+        with self._url_cond:
+            self._url_cond.notify_all()
+        
+        # Wait for workers to finish and release the pool threads. Snapshot
+        # under the lock but wait outside it: _parse_worker's exit path takes
+        # thread_lock, so waiting while holding it would stall every cancel
+        # for the full timeout
+        with self.thread_lock:
+            pending = self.futures + self.parse_futures
+        wait_futures(pending, timeout=2.0)
         with self.thread_lock:
-            for thread in self.threads:
-                if thread.is_alive():
-                    thread.join(timeout=1.0)
+            self._shutdown_executors()
         
-        # Wait for batch processor to finish
+        # Wait for batch processor to finish; the sentinel wakes it
+        # immediately instead of letting it sit out its poll timeout
         if self.batch_processor.is_alive():
+            self.results_queue.put(_WRITER_SHUTDOWN)
             self.batch_processor.join(timeout=2.0)
         
         # Get results from database before cleanup
-        results = []
+        results = self._rows_to_columns([])
         try:
-            conn = self._get_db_connection()
+            conn = self._get_read_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM results")
-            rows = cursor.fetchall()
-            for row in rows:
-                results.append({
-                    'url': row[0],
-                    'status': row[1],
-                    'referrer': row[2],
-                    'type': row[3],
-                    'domain': row[4],
-                    'depth': row[5]
-                })
+            results = self._rows_to_columns(cursor.fetchall())
             conn.close()
-            self.log(f"Retrieved {len(results)} results from database before cleanup")
+            self.log(f"Retrieved {len(results['url'])} results from database before cleanup")
         except Exception as e:
             self.log(f"Error getting results from database: {str(e)}")
         
@@ -501,28 +762,22 @@ class Spider:
         return results
     
     def get_results(self):
-        """Get all results from the database"""
-        # Wait for batch processor to finish
+        """Get all results from the database as a dict of column lists"""
+        # Tell the writer to drain and close its connection, then wait;
+        # without the sentinel it would sit in its loop forever and hold
+        # the database file open through _cleanup
         if self.batch_processor.is_alive():
+            self.results_queue.put(_WRITER_SHUTDOWN)
             self.batch_processor.join(timeout=5.0)
-        
-        results = []
+
+        results = self._rows_to_columns([])
         conn = None
         try:
-            conn = self._get_db_connection()
+            conn = self._get_read_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM results")
-            rows = cursor.fetchall()
-            for row in rows:
-                results.append({
-                    'url': row[0],
-                    'status': row[1],
-                    'referrer': row[2],
-                    'type': row[3],
-                    'domain': row[4],
-                    'depth': row[5]
-                })
-            self.log(f"Retrieved {len(results)} results from database")
+            results = self._rows_to_columns(cursor.fetchall())
+            self.log(f"Retrieved {len(results['url'])} results from database")
         except Exception as e:
             self.log(f"Error getting results from database: {str(e)}")
         finally:
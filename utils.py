@@ -1,7 +1,9 @@
 from urllib.parse import urlparse, urljoin
+from functools import lru_cache
 import re
 
 
+@lru_cache(maxsize=65536)
 def is_valid_url(url):
     """Check if a URL is valid and has a proper scheme and netloc"""
     try:
@@ -11,8 +13,13 @@ def is_valid_url(url):
         return False
 
 
+@lru_cache(maxsize=65536)
 def get_domain(url):
-    """Extract the domain from a URL, removing www. prefix"""
+    """Extract the domain from a URL, removing www. prefix
+
+    Cached because a crawl calls this with the same handful of hosts
+    thousands of times; a cache hit skips the urlparse entirely.
+    """
     parsed = urlparse(url)
     return parsed.netloc.replace('www.', '')
 
@@ -22,6 +29,12 @@ def is_external_url(base_domain, url):
     return get_domain(url) != base_domain
 
 
+def is_external_domain(base_domain, domain):
+    """Check if an already-extracted domain is external to the base domain"""
+    return domain != base_domain
+
+
+@lru_cache(maxsize=65536)
 def normalize_url(url):
     """Normalize a URL by removing trailing slashes and fragments"""
     parsed = urlparse(url)
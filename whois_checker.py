@@ -1,50 +1,72 @@
 import json
 import requests
 import os
+import tempfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SETTINGS_FILE = "settings.json"
+
+
+def _json_loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_dumps(obj):
+    """Serialize to UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
 
 class WhoisChecker:
-    def __init__(self, api_key=None):
-        self.api_key = api_key
-        if not self.api_key:
-            self.api_key = self._load_api_key_from_settings()
+    def __init__(self, api_key=None, session=None):
+        # Settings are loaded once and kept in memory; set_api_key mutates
+        # this dict and writes it back instead of re-reading the file
+        self._settings = self._load_settings()
+        self.api_key = api_key or self._settings.get("api_key", "")
+        # Shared session keeps the WHOIS API connection alive across lookups.
+        # The API key stays in per-request headers rather than on the session,
+        # which may be shared with the spider and hit arbitrary crawled hosts.
+        self.session = session or requests.Session()
+        self._headers = {'X-Api-Key': self.api_key}
         print(self.api_key)
-    
-    def _load_api_key_from_settings(self):
-        settings_file = "settings.json"
+
+    def _load_settings(self):
         try:
-            if os.path.exists(settings_file):
-                with open(settings_file, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    return settings.get("api_key", "")
-            return ""
+            if os.path.exists(SETTINGS_FILE):
+                with open(SETTINGS_FILE, "rb") as f:
+                    return _json_loads(f.read())
+            return {}
         except Exception:
-            return ""
-    
+            return {}
+
     def set_api_key(self, key):
         self.api_key = key
-        # Save to settings.json
-        settings_file = "settings.json"
-        settings = {}
-        if os.path.exists(settings_file):
-            try:
-                with open(settings_file, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-            except Exception:
-                pass
-        
-        settings["api_key"] = key
-        
-        with open(settings_file, "w", encoding="utf-8") as f:
-            json.dump(settings, f)
+        self._headers = {'X-Api-Key': key}
+        self._settings["api_key"] = key
+        # Write to a temp file in the same directory and rename over the
+        # original so a crash mid-write never leaves a truncated file
+        fd, tmp_path = tempfile.mkstemp(dir=".", suffix=".json")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_json_dumps(self._settings))
+            os.replace(tmp_path, SETTINGS_FILE)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
     def check_domain(self, domain):
         url = f'https://api.api-ninjas.com/v1/whois?domain={domain}'
-        headers = {'X-Api-Key': self.api_key}
         try:
-            response = requests.get(url, headers=headers, timeout=100)
+            response = self.session.get(url, headers=self._headers, timeout=100)
+            # Parse the body once for both the success and error branches
+            body = response.content
+            data = _json_loads(body) if body else {}
             if response.status_code == 200:
-                data = response.json()
-                
                 # Extract owner information
                 owner = data.get("name", "")
                 if not owner:
@@ -59,7 +81,7 @@ class WhoisChecker:
                     "status": registrar
                 }
             else:
-                error_msg = response.json().get('error', 'Unknown error')
+                error_msg = data.get('error', 'Unknown error')
                 return {
                     "owner": "Error",
                     "status": f"WHOIS error: {error_msg}"